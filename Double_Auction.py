@@ -1,3 +1,11 @@
+import numpy as np
+
+# Books with at most this many orders (both sides together) are matched and
+# attributed with plain loops: below it NumPy's per-call overhead costs more
+# than the loops it replaces.
+SMALL_BOOK_ORDERS = 64
+
+
 def double_auction_uniform_price(bids, asks):
     """
     Implements a call auction clearing mechanism:
@@ -11,6 +19,10 @@ def double_auction_uniform_price(bids, asks):
          - Continue until the condition fails.
     5. The uniform price is defined as the average of the last cleared bid and ask prices.
     
+    This is the reference definition of the rules, and the quickest way to
+    clear a handful of orders. match_orders gives the same results along
+    with the fills, in O(n log n) for books of any size.
+
     Returns:
        uniform_price (float) and total traded quantity (int).
     """
@@ -52,3 +64,411 @@ def double_auction_uniform_price(bids, asks):
         return 0, 0
     uniform_price = (last_bid_price + last_ask_price) / 2
     return uniform_price, traded_quantity
+
+
+def participant_profit(is_buyer, trades, uniform_price, marginal_value_first, marginal_value_second):
+    """
+    Profit of one participant on a round's trades at the uniform price.
+
+    trades lists the participant's traded quantities in matching order. A
+    buyer's first trade is valued at marginal_value_first and the rest at
+    marginal_value_second; a seller's first trade costs marginal_value_second
+    and the rest marginal_value_first.
+    """
+    if not trades:
+        return 0
+    return fill_profit(is_buyer, trades[0], sum(trades), uniform_price,
+                       marginal_value_first, marginal_value_second)
+
+
+def fill_profit(is_buyer, first_quantity, total_quantity, uniform_price,
+                marginal_value_first, marginal_value_second):
+    """
+    participant_profit from the quantity of the participant's first trade
+    and their total traded quantity (see Fills.traded).
+    """
+    if not total_quantity:
+        return 0
+    if is_buyer:
+        first, rest = marginal_value_first - uniform_price, marginal_value_second - uniform_price
+    else:
+        first, rest = uniform_price - marginal_value_second, uniform_price - marginal_value_first
+    if total_quantity == first_quantity:
+        return first * first_quantity
+    return first * first_quantity + rest * (total_quantity - first_quantity)
+
+
+def _as_price_quantity(orders):
+    """
+    Returns (prices, quantities) as 1-D NumPy arrays.
+
+    Accepts a list of (price, quantity) pairs, an (n, 2) array, or a
+    (prices, quantities) tuple of 1-D arrays. Array inputs are viewed, not
+    copied, when they are already contiguous NumPy arrays.
+    """
+    if isinstance(orders, tuple) and len(orders) == 2 \
+            and isinstance(orders[0], np.ndarray) and orders[0].ndim == 1:
+        return np.asarray(orders[0]), np.asarray(orders[1])
+    arr = np.asarray(orders)
+    if arr.ndim != 2 or arr.shape[1] != 2:
+        raise ValueError("Orders must be (price, quantity) pairs")
+    prices, quantities = arr[:, 0], arr[:, 1]
+    if not isinstance(orders, np.ndarray) and quantities.dtype.kind == 'f' \
+            and np.all(quantities == np.floor(quantities)):
+        # Lists of (float price, int quantity) pairs are upcast by NumPy;
+        # keep whole quantities integral like the sequential loop does.
+        quantities = quantities.astype(np.int64)
+    return prices, quantities
+
+
+def _matching_order(bids, asks, presorted=False):
+    """
+    Bid and ask input positions in matching order, with the sorted prices
+    and quantities: bids by descending price and asks by ascending price,
+    ties broken by ascending quantity and then by input position.
+
+    With presorted, the books are taken to be in that order already (as
+    OrderBook.side_orders returns them) and are not sorted again.
+    """
+    bid_prices, bid_qtys = _as_price_quantity(bids)
+    ask_prices, ask_qtys = _as_price_quantity(asks)
+    if presorted:
+        return (np.arange(len(bid_prices)), bid_prices, bid_qtys,
+                np.arange(len(ask_prices)), ask_prices, ask_qtys)
+    # lexsort is stable, so equal orders keep their input order.
+    bid_order = np.lexsort((bid_qtys, -bid_prices))
+    ask_order = np.lexsort((ask_qtys, ask_prices))
+    return (bid_order, bid_prices[bid_order], bid_qtys[bid_order],
+            ask_order, ask_prices[ask_order], ask_qtys[ask_order])
+
+
+def _clear_sorted(bp, bq, ap, aq, demand, supply):
+    """
+    Uniform price and traded quantity of books in matching order, where
+    demand and supply are the cumulative bid and ask quantities.
+
+    A unit x of volume trades when the bid covering x is priced at least the
+    ask covering x; since demand only falls and supply only rises, the traded
+    quantity is the largest curve breakpoint meeting that condition, found
+    with searchsorted. The uniform price is the average of the bid and ask
+    that covered the last traded unit. Orders with zero quantity are skipped
+    over exactly as the sequential loop would, so they can still set the
+    last matched prices.
+    """
+    if len(bp) == 0 or len(ap) == 0 or bp[0] < ap[0]:
+        return 0, 0
+
+    limit = min(demand[-1], supply[-1])
+
+    # Candidate traded quantities are the breakpoints of either curve.
+    candidates = np.concatenate((demand, supply))
+    candidates = candidates[(candidates > 0) & (candidates <= limit)]
+    if len(candidates) == 0:
+        return 0, 0
+    bid_at = np.searchsorted(demand, candidates, side='left')
+    ask_at = np.searchsorted(supply, candidates, side='left')
+    crossing = bp[bid_at] >= ap[ask_at]
+    if not crossing.any():
+        return 0, 0
+    k = np.flatnonzero(crossing)
+    k = k[np.argmax(candidates[k])]
+    traded_quantity = candidates[k]
+    i = int(bid_at[k])
+    j = int(ask_at[k])
+    last_bid_price = bp[i]
+    last_ask_price = ap[j]
+
+    # Continue past the last traded unit over zero-quantity orders, which the
+    # sequential loop still visits while prices cross.
+    bid_left = demand[i] - traded_quantity
+    ask_left = supply[j] - traded_quantity
+    if bid_left == 0:
+        i += 1
+        bid_left = bq[i] if i < len(bq) else 0
+    if ask_left == 0:
+        j += 1
+        ask_left = aq[j] if j < len(aq) else 0
+    while i < len(bp) and j < len(ap) and bp[i] >= ap[j]:
+        if bid_left != 0 and ask_left != 0:
+            break
+        last_bid_price = bp[i]
+        last_ask_price = ap[j]
+        if bid_left == 0:
+            i += 1
+            bid_left = bq[i] if i < len(bq) else 0
+        if ask_left == 0:
+            j += 1
+            ask_left = aq[j] if j < len(aq) else 0
+
+    uniform_price = (last_bid_price + last_ask_price) / 2
+    return float(uniform_price), traded_quantity.item()
+
+
+def double_auction_uniform_price_vectorized(bids, asks):
+    """
+    NumPy clearing engine with the same results as double_auction_uniform_price.
+
+    Instead of walking the sorted books pair by pair, the aggregated demand
+    and supply curves are built from cumulative quantities (see
+    _clear_sorted). This is match_orders without the fills.
+
+    Returns:
+       uniform_price (float) and total traded quantity (int).
+    """
+    if len(bids) == 0 or len(asks) == 0:
+        return 0, 0
+    _, bp, bq, _, ap, aq = _matching_order(bids, asks)
+    return _clear_sorted(bp, bq, ap, aq, np.cumsum(bq), np.cumsum(aq))
+
+
+class Fills:
+    """
+    The trades of one clearing, as parallel arrays with one entry per fill.
+
+    A fill is one step of the pairwise matching loop: the bid at input
+    position bid_index[k] and the ask at ask_index[k] trade quantity[k].
+    Fills are in matching order, so a participant's first fill is the one
+    participant_profit values at the first marginal value.
+    """
+    __slots__ = ('uniform_price', 'total_quantity', 'bid_index', 'ask_index', 'quantity')
+
+    def __init__(self, uniform_price, total_quantity, bid_index, ask_index, quantity):
+        self.uniform_price = uniform_price
+        self.total_quantity = total_quantity
+        self.bid_index = bid_index
+        self.ask_index = ask_index
+        self.quantity = quantity
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def traded(self, side, owners, count):
+        """
+        First fill and total traded quantity of each owner on one side.
+
+        owners gives the owner number, in range(count), of every input order
+        on side ('bid' or 'ask'). Returns two lists indexed by owner number;
+        owners without fills get 0 for both.
+        """
+        index = self.bid_index if side == 'bid' else self.ask_index
+        if len(index) <= SMALL_BOOK_ORDERS:
+            first, total = [0] * count, [0] * count
+            for order, quantity in zip(index.tolist(), self.quantity.tolist()):
+                owner = owners[order]
+                if not total[owner]:
+                    first[owner] = quantity
+                total[owner] += quantity
+            return first, total
+        owner = np.asarray(owners, dtype=np.intp)[index]
+        dtype = self.quantity.dtype
+        total = np.bincount(owner, weights=self.quantity, minlength=count).astype(dtype)
+        first = np.zeros(count, dtype=dtype)
+        owner_numbers, first_fill = np.unique(owner, return_index=True)
+        first[owner_numbers] = self.quantity[first_fill]
+        return first.tolist(), total.tolist()
+
+
+def match_orders(bids, asks, presorted=False):
+    """
+    The clearing engine: matches bids against asks under the rules of
+    double_auction_uniform_price and returns the price, volume and fills.
+
+    bids and asks take the forms double_auction_uniform_price_vectorized
+    accepts; pass presorted=True when both are already in matching order
+    (see _matching_order), as books from OrderBook.side_orders are, to skip
+    sorting them. Sorting the books is the only O(n log n) step; the fills are
+    the merged breakpoints of the demand and supply curves up to the traded
+    volume, each attributed with searchsorted to the bid and the ask that
+    cover it, so no per-trade objects are built. Books of up to
+    SMALL_BOOK_ORDERS orders are matched by _match_loop instead.
+
+    Returns:
+       Fills, indexing into the bids and asks as given.
+    """
+    if len(bids) + len(asks) <= SMALL_BOOK_ORDERS:
+        return _match_loop(bids, asks, presorted)
+    return _match_vectorized(bids, asks, presorted)
+
+
+def _match_vectorized(bids, asks, presorted=False):
+    """match_orders on the demand and supply curves, for books of any size."""
+    empty = np.zeros(0, dtype=np.intp)
+    if len(bids) == 0 or len(asks) == 0:
+        return Fills(0, 0, empty, empty, np.zeros(0, dtype=np.int64))
+    bid_order, bp, bq, ask_order, ap, aq = _matching_order(bids, asks, presorted)
+    demand = np.cumsum(bq)
+    supply = np.cumsum(aq)
+    uniform_price, traded_quantity = _clear_sorted(bp, bq, ap, aq, demand, supply)
+    if not traded_quantity:
+        return Fills(uniform_price, traded_quantity, empty, empty, np.zeros(0, dtype=bq.dtype))
+
+    # A fill ends wherever either curve has a breakpoint, and at the volume.
+    ends = np.union1d(demand[demand < traded_quantity], supply[supply < traded_quantity])
+    ends = np.append(ends[ends > 0], traded_quantity)
+    bid_at = np.searchsorted(demand, ends, side='left')
+    ask_at = np.searchsorted(supply, ends, side='left')
+    quantity = np.diff(ends, prepend=0).astype(bq.dtype)
+    return Fills(uniform_price, traded_quantity, bid_order[bid_at], ask_order[ask_at], quantity)
+
+
+class PriceLadder:
+    """
+    Cumulative demand and supply over the grid of price ticks, kept in two
+    Fenwick (binary indexed) trees so each order insertion and each clearing
+    query costs O(log n) in the width of the price range, in ticks.
+
+    clear() applies the rules of double_auction_uniform_price to the orders
+    added so far: the traded quantity is the largest volume at which the
+    remaining demand meets supply, and the uniform price is the average of the
+    bid and ask prices covering the last traded unit. Prices are rounded to
+    the tick grid (multiples of tick).
+
+    The trees are sparse: a dict holds only the nodes an insertion has
+    touched, at most O(log n) per distinct price, so a wide price range costs
+    neither memory nor a rebuild. The grid doubles upward when an order is
+    priced above it, which only adds a root node holding the side's total.
+    """
+
+    def __init__(self, tick=0.01):
+        self.tick = tick
+        self._decimals = max(0, -int(np.floor(np.log10(tick))))
+        self.total_bid = 0
+        self.total_ask = 0
+        # The grid covers ticks 0 .. size - 2. An ask at tick t sits at tree
+        # position t + 1, so ask_tree prefix(p) is the supply at prices up to
+        # tick p - 1. A bid at tick t sits at position t + 2, so bid_tree
+        # prefix(p) is the demand priced below tick p - 1.
+        self._size = 2
+        self._bid_tree = {}
+        self._ask_tree = {}
+
+    def to_tick(self, price):
+        return int(round(price / self.tick))
+
+    def to_price(self, tick):
+        return round(tick * self.tick, self._decimals)
+
+    def add(self, side, price, quantity):
+        """Add quantity at price on the 'bid' or 'ask' side."""
+        tick = self.to_tick(price)
+        if tick < 0:
+            raise ValueError("Price must not be negative")
+        while tick + 2 > self._size:
+            # Node 2 * size covers the whole doubled grid; the nodes between
+            # cover only the new, empty upper half.
+            self._size *= 2
+            self._bid_tree[self._size] = self.total_bid
+            self._ask_tree[self._size] = self.total_ask
+        if side == 'bid':
+            self.total_bid += quantity
+            tree = self._bid_tree
+            position = tick + 2
+        else:
+            self.total_ask += quantity
+            tree = self._ask_tree
+            position = tick + 1
+        while position <= self._size:
+            tree[position] = tree.get(position, 0) + quantity
+            position += position & -position
+
+    def _descend(self, limit, strict, bids=True, asks=True):
+        """
+        Largest position p whose combined prefix sum over the selected trees
+        is below limit (strict) or at most limit; 0 if there is none.
+        """
+        position = 0
+        total = 0
+        step = self._size
+        while step:
+            candidate = position + step
+            if candidate <= self._size:
+                value = total
+                if bids:
+                    value += self._bid_tree.get(candidate, 0)
+                if asks:
+                    value += self._ask_tree.get(candidate, 0)
+                if value < limit or (not strict and value == limit):
+                    position = candidate
+                    total = value
+            step //= 2
+        return position
+
+    def _prefix(self, tree, position):
+        total = 0
+        while position > 0:
+            total += tree.get(position, 0)
+            position -= position & -position
+        return total
+
+    def clear(self):
+        """
+        Returns:
+           uniform_price (float) and total traded quantity, as
+           double_auction_uniform_price would for the same orders.
+        """
+        if not self.total_bid or not self.total_ask:
+            return 0, 0
+        # supply(t) + demand below t rises with t; the last tick where it is
+        # still under total demand is the last tick where supply < demand.
+        last_short = self._descend(self.total_bid, strict=True) - 1
+        traded_quantity = 0
+        if last_short >= 0:
+            traded_quantity = self._prefix(self._ask_tree, last_short + 1)
+        if last_short + 1 <= self._size - 2:
+            demand = self.total_bid - self._prefix(self._bid_tree, last_short + 2)
+            traded_quantity = max(traded_quantity, demand)
+        if traded_quantity <= 0:
+            return 0, 0
+        # Highest bid tick still covering traded_quantity units of demand,
+        # and lowest ask tick covering traded_quantity units of supply.
+        bid_tick = self._descend(self.total_bid - traded_quantity, strict=False, asks=False) - 1
+        ask_tick = self._descend(traded_quantity, strict=True, bids=False)
+        uniform_price = (self.to_price(bid_tick) + self.to_price(ask_tick)) / 2
+        return uniform_price, traded_quantity
+
+
+def _match_loop(bids, asks, presorted=False):
+    """match_orders by the pairwise matching loop of double_auction_uniform_price."""
+    bid_prices, bid_qtys = _as_price_quantity(bids)
+    ask_prices, ask_qtys = _as_price_quantity(asks)
+    bp, bq = bid_prices.tolist(), bid_qtys.tolist()
+    ap, aq = ask_prices.tolist(), ask_qtys.tolist()
+    if presorted:
+        bid_order, ask_order = range(len(bp)), range(len(ap))
+    else:
+        # sorted is stable, so equal orders keep their input order.
+        bid_order = sorted(range(len(bp)), key=lambda k: (-bp[k], bq[k]))
+        ask_order = sorted(range(len(ap)), key=lambda k: (ap[k], aq[k]))
+
+    bid_index, ask_index, quantity = [], [], []
+    traded_quantity = 0
+    last_bid_price = last_ask_price = 0
+    i = j = 0
+    bid_left = bq[bid_order[0]] if bp else 0
+    ask_left = aq[ask_order[0]] if ap else 0
+    while i < len(bp) and j < len(ap):
+        bid, ask = bid_order[i], ask_order[j]
+        if bp[bid] < ap[ask]:
+            break
+        trade_qty = min(bid_left, ask_left)
+        if trade_qty:
+            bid_index.append(bid)
+            ask_index.append(ask)
+            quantity.append(trade_qty)
+            traded_quantity += trade_qty
+        last_bid_price, last_ask_price = bp[bid], ap[ask]
+        bid_left -= trade_qty
+        ask_left -= trade_qty
+        if bid_left == 0:
+            i += 1
+            bid_left = bq[bid_order[i]] if i < len(bp) else 0
+        if ask_left == 0:
+            j += 1
+            ask_left = aq[ask_order[j]] if j < len(ap) else 0
+
+    if not traded_quantity:
+        empty = np.zeros(0, dtype=np.intp)
+        return Fills(0, 0, empty, empty, np.zeros(0, dtype=bid_qtys.dtype))
+    return Fills((last_bid_price + last_ask_price) / 2, traded_quantity,
+                 np.array(bid_index, dtype=np.intp), np.array(ask_index, dtype=np.intp),
+                 np.array(quantity, dtype=bid_qtys.dtype))
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+from sqlalchemy import DateTime, Float, Integer
+
+
+def column_array(column, values):
+    """
+    The values of one SQLAlchemy column as a NumPy array of a fixed-width
+    dtype, so it can be memory-mapped: integers as int64, floats as float64
+    (None as NaN), datetimes as datetime64[us] (None as NaT) and everything
+    else as unicode strings (None as '').
+    """
+    if isinstance(column.type, Integer):
+        return np.array(values, dtype=np.int64)
+    if isinstance(column.type, Float):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    if isinstance(column.type, DateTime):
+        return np.array(values, dtype='datetime64[us]')
+    return np.array(['' if value is None else str(value) for value in values], dtype=np.str_)
+
+
+def write_archive(path, tables):
+    """
+    Write tables, {table: {column: array}}, to path as a compressed .npz
+    with one member per column, named TABLE.COLUMN.
+
+    The file is written under a temporary name and moved into place, so a
+    reader never sees a partial archive.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    members = {f'{table}.{column}': values
+               for table, columns in tables.items() for column, values in columns.items()}
+    fd, staging = tempfile.mkstemp(suffix='.npz', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **members)
+        os.replace(staging, path)
+    except BaseException:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+
+
+def file_version(path):
+    """Identifies one write of the file at path: its modification time and size."""
+    stat = os.stat(path)
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
+
+
+class SessionArchive:
+    """
+    Read access to an archive written by write_archive.
+
+    Compressed .npz members cannot be memory-mapped, so the first open
+    extracts the archive once into its own directory under cache_dir; from
+    then on every column is a read-only memory-mapped array, and a query
+    only reads the pages it touches.
+
+    The directory is named after the file and its version, so an archive
+    that is written again is extracted afresh rather than served from the
+    previous extraction, which is removed.
+    """
+
+    def __init__(self, path, cache_dir):
+        self.path = path
+        self.version = file_version(path)
+        self._name = os.path.splitext(os.path.basename(path))[0]
+        self.directory = os.path.join(cache_dir, f'{self._name}@{self.version}')
+        if not os.path.isdir(self.directory):
+            self._extract(cache_dir)
+            self._remove_old_extractions(cache_dir)
+        self._tables = {}
+
+    def _extract(self, cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=cache_dir)
+        try:
+            with zipfile.ZipFile(self.path) as archive:
+                archive.extractall(staging)
+            try:
+                os.rename(staging, self.directory)
+            except OSError:
+                # Another process extracted the archive first.
+                shutil.rmtree(staging)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def _remove_old_extractions(self, cache_dir):
+        for entry in os.listdir(cache_dir):
+            if entry.startswith(self._name + '@') and entry != os.path.basename(self.directory):
+                # Readers with the old columns mapped keep them until they close.
+                shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+
+    def table(self, name):
+        """{column: memory-mapped array} of one archived table."""
+        columns = self._tables.get(name)
+        if columns is None:
+            prefix = name + '.'
+            columns = {filename[len(prefix):-len('.npy')]: np.load(os.path.join(self.directory, filename),
+                                                                   mmap_mode='r')
+                       for filename in sorted(os.listdir(self.directory))
+                       if filename.startswith(prefix) and filename.endswith('.npy')}
+            if not columns:
+                raise KeyError(name)
+            self._tables[name] = columns
+        return columns
+
+    def select(self, name, **conditions):
+        """The rows of table name whose columns equal the given values, as {column: array}."""
+        columns = self.table(name)
+        mask = None
+        for column, value in conditions.items():
+            matches = columns[column] == value
+            mask = matches if mask is None else mask & matches
+        if mask is None:
+            return dict(columns)
+        return {column: values[mask] for column, values in columns.items()}
+
+    def round_orders(self, round_number, side):
+        """
+        One round's 'bid' or 'ask' orders from the archived 'bids' table in
+        arrival order, as participant ids and the (prices, quantities)
+        arrays Double_Auction.match_orders takes, for replaying the round.
+        """
+        orders = self.select('bids', round_number=round_number, type=side)
+        arrival = np.argsort(orders['id'], kind='stable')
+        return (orders['participant_id'][arrival].tolist(),
+                (orders['price'][arrival], orders['quantity'][arrival]))
@@ -0,0 +1,51 @@
+"""
+Seeded synthetic order books for the benchmarks.
+
+Every book is a (bids, asks) pair of (prices, quantities) NumPy arrays with
+prices on the 0.01 tick grid and positive integer quantities, so the same
+book is valid input for every clearing engine and for bid_submit.
+
+Patterns:
+    dispersed    prices spread uniformly over 1..100, partial overlap
+    narrow       prices within a few ticks of 10, many orders per level
+    ties         every order at the same price and quantity (worst case for
+                 tie breaking: one level holding the whole book)
+    crossed      every bid above every ask, so the whole book trades and the
+                 matching walk visits every order
+"""
+import numpy as np
+
+PATTERNS = ('dispersed', 'narrow', 'ties', 'crossed')
+
+
+def make_book(orders, pattern, seed=0):
+    rng = np.random.default_rng(seed)
+    n_bids = orders // 2
+    n_asks = orders - n_bids
+    if pattern == 'dispersed':
+        bid_prices = rng.uniform(1, 100, n_bids)
+        ask_prices = rng.uniform(1, 100, n_asks)
+    elif pattern == 'narrow':
+        bid_prices = 10 + rng.integers(-5, 6, n_bids) * 0.01
+        ask_prices = 10 + rng.integers(-5, 6, n_asks) * 0.01
+    elif pattern == 'ties':
+        bid_prices = np.full(n_bids, 10.0)
+        ask_prices = np.full(n_asks, 10.0)
+    elif pattern == 'crossed':
+        bid_prices = rng.uniform(50, 100, n_bids)
+        ask_prices = rng.uniform(1, 50, n_asks)
+    else:
+        raise ValueError(f'Unknown pattern: {pattern}')
+    if pattern == 'ties':
+        bid_qtys = np.ones(n_bids, dtype=np.int64)
+        ask_qtys = np.ones(n_asks, dtype=np.int64)
+    else:
+        bid_qtys = rng.integers(1, 11, n_bids)
+        ask_qtys = rng.integers(1, 11, n_asks)
+    return (np.round(bid_prices, 2), bid_qtys), (np.round(ask_prices, 2), ask_qtys)
+
+
+def as_pairs(side):
+    """(prices, quantities) arrays as the list of (price, quantity) pairs the loop engine takes."""
+    prices, quantities = side
+    return list(zip(prices.tolist(), quantities.tolist()))
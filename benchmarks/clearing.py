@@ -0,0 +1,266 @@
+"""
+Benchmark suite for the clearing engine and the settlement path.
+
+Suites:
+    engine       double_auction_uniform_price, its vectorized NumPy variant,
+                 match_orders (with fills, also on presorted OrderBook sides),
+                 PriceLadder and OrderBook on in-memory books
+    settlement   process_bid_round against SQLite through the ORM, including
+                 replaying the round's orders into the order book
+    endpoint     the bid_submit request that completes a round, until its
+                 results are served by /round_result, through the Flask
+                 test client
+
+Each measurement runs on seeded books (see books.py) for every size and
+pattern, and reports the best and median of --repeats runs. Results are
+written as JSON so runs from different commits can be compared.
+
+Usage:
+    python benchmarks/clearing.py [--suite engine,settlement,endpoint]
+        [--sizes 10,100,1000,10000,100000,1000000] [--db-max-orders 100000]
+        [--patterns dispersed,narrow,ties,crossed] [--repeats 3] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Double_Auction import (  # noqa: E402
+    PriceLadder, double_auction_uniform_price, double_auction_uniform_price_vectorized, match_orders
+)
+from books import PATTERNS, as_pairs, make_book  # noqa: E402
+from order_book import OrderBook  # noqa: E402
+
+PARTICIPANTS = (('b1', 'bidder1'), ('b2', 'bidder2'), ('s1', 'seller1'), ('s2', 'seller2'))
+SESSION_ID = 1   # the default session
+
+
+def timed(run, repeats, setup=None):
+    """Best and median seconds of repeats calls to run(state), with untimed setup() -> state."""
+    samples = []
+    for _ in range(repeats):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        samples.append(time.perf_counter() - start)
+    return {'best_s': min(samples), 'median_s': statistics.median(samples)}
+
+
+def bench_engine(sizes, patterns, repeats, seed):
+    def ladder(book):
+        (bid_prices, bid_qtys), (ask_prices, ask_qtys) = book
+        ladder = PriceLadder()
+        for price, quantity in zip(bid_prices.tolist(), bid_qtys.tolist()):
+            ladder.add('bid', price, quantity)
+        for price, quantity in zip(ask_prices.tolist(), ask_qtys.tolist()):
+            ladder.add('ask', price, quantity)
+        return ladder.clear()
+
+    def fill_order_book(book):
+        (bid_prices, bid_qtys), (ask_prices, ask_qtys) = book
+        ob = OrderBook(1)
+        for price, quantity in zip(bid_prices.tolist(), bid_qtys.tolist()):
+            ob.add('b1', price, quantity, 'bid')
+        for price, quantity in zip(ask_prices.tolist(), ask_qtys.tolist()):
+            ob.add('s1', price, quantity, 'ask')
+        return ob
+
+    def order_book(book):
+        return fill_order_book(book).ladder.clear()
+
+    results = []
+    for pattern in patterns:
+        for size in sizes:
+            bids, asks = make_book(size, pattern, seed)
+            pairs = (as_pairs(bids), as_pairs(asks))
+            # What process_bid_round hands match_orders at close.
+            ob = fill_order_book((bids, asks))
+            book_bids, book_asks = ob.side_orders('bid')[1], ob.side_orders('ask')[1]
+            engines = {
+                'loop': lambda _: double_auction_uniform_price(*pairs),
+                'vectorized_lists': lambda _: double_auction_uniform_price_vectorized(*pairs),
+                'vectorized_arrays': lambda _: double_auction_uniform_price_vectorized(bids, asks),
+                'match_orders': lambda _: match_orders(bids, asks),
+                'match_orders_presorted': lambda _: match_orders(book_bids, book_asks, presorted=True),
+                'price_ladder': lambda _: ladder((bids, asks)),
+                'order_book': lambda _: order_book((bids, asks)),
+            }
+            for name, run in engines.items():
+                results.append({'suite': 'engine', 'name': name, 'pattern': pattern, 'orders': size,
+                                **timed(run, repeats)})
+                print_result(results[-1])
+    return results
+
+
+def load_app(workdir):
+    """Import the application against a fresh SQLite database in workdir."""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.chdir(workdir)  # auction.log is written to the working directory
+    from flask_migrate import upgrade
+    from instance import app as app_module
+    with app_module.app.app_context():
+        upgrade()
+        app_module.get_current_round(SESSION_ID)
+        app_module.db.session.execute(app_module.db.insert(app_module.Participant), [
+            {'session_id': SESSION_ID, 'participant_id': pid, 'first_name': 'bench', 'last_name': pid, 'role': role,
+             'marginal_value_first': 60, 'marginal_value_second': 40, 'tokens': 0}
+            for pid, role in PARTICIPANTS
+        ])
+        app_module.db.session.commit()
+    return app_module
+
+
+def book_rows(book, round_number):
+    """Spread a book over the four participants as ParticipantBid rows."""
+    rows = []
+    for side, pids in (('bid', ('b1', 'b2')), ('ask', ('s1', 's2'))):
+        prices, quantities = book[0] if side == 'bid' else book[1]
+        for k, (price, quantity) in enumerate(zip(prices.tolist(), quantities.tolist())):
+            rows.append({'session_id': SESSION_ID, 'participant_id': pids[k % 2], 'price': price, 'quantity': quantity,
+                         'type': side, 'round_number': round_number})
+    return rows
+
+
+def reset_auction(app_module):
+    """Remove all orders and results and reopen round 1."""
+    db = app_module.db
+    for model in (app_module.ParticipantBid, app_module.AuctionRound, app_module.ParticipantRoundResult):
+        db.session.execute(db.delete(model))
+    db.session.execute(db.update(app_module.AuctionSession).values(current_round=1))
+    db.session.commit()
+    app_module.order_books.discard(SESSION_ID, 1)
+    app_module.response_cache.clear()
+
+
+def bench_settlement(app_module, sizes, patterns, repeats, seed):
+    db = app_module.db
+    results = []
+
+    def setup(rows):
+        def prepare():
+            reset_auction(app_module)
+            db.session.execute(db.insert(app_module.ParticipantBid), rows)
+            db.session.commit()
+            return SESSION_ID, 1
+        return prepare
+
+    with app_module.app.app_context():
+        for pattern in patterns:
+            for size in sizes:
+                rows = book_rows(make_book(size, pattern, seed), 1)
+                results.append({'suite': 'settlement', 'name': 'process_bid_round', 'pattern': pattern,
+                                'orders': size,
+                                **timed(lambda state: app_module.process_bid_round(*state), repeats,
+                                        setup(rows))})
+                print_result(results[-1])
+    return results
+
+
+def bench_endpoint(app_module, sizes, patterns, repeats, seed):
+    client = app_module.app.test_client()
+    results = []
+
+    def payloads(book):
+        rows = book_rows(book, 0)
+        by_participant = {pid: [] for pid, _ in PARTICIPANTS}
+        for row in rows:
+            by_participant[row['participant_id']].append(
+                {'price': row['price'], 'quantity': row['quantity'], 'type': row['type']})
+        return by_participant
+
+    def setup(by_participant):
+        def prepare():
+            with app_module.app.app_context():
+                reset_auction(app_module)
+            for pid in ('b1', 'b2', 's1'):
+                client.post('/bid_submit', json={'participantId': pid, 'bids': by_participant[pid]})
+            return by_participant['s2']
+        return prepare
+
+    def close_round(bids):
+        response = client.post('/bid_submit', json={'participantId': 's2', 'bids': bids})
+        assert response.get_json().get('status') == 'pending', response.get_json()
+        # Clearing runs on the round scheduler; wait for the results to appear.
+        response = client.get('/round_result?participantId=s2&roundNumber=1&wait=60')
+        assert 'round_info' in response.get_json(), response.get_json()
+
+    for pattern in patterns:
+        for size in sizes:
+            by_participant = payloads(make_book(max(size, 4), pattern, seed))
+            results.append({'suite': 'endpoint', 'name': 'bid_submit_round_close', 'pattern': pattern,
+                            'orders': size, **timed(close_round, repeats, setup(by_participant))})
+            print_result(results[-1])
+    return results
+
+
+def print_result(result):
+    print(f"{result['suite']:<10} {result['name']:<24} {result['pattern']:<10} "
+          f"{result['orders']:>8}  best {result['best_s'] * 1000:10.3f} ms  "
+          f"median {result['median_s'] * 1000:10.3f} ms", flush=True)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suite', default='engine,settlement,endpoint')
+    parser.add_argument('--sizes', default='10,100,1000,10000,100000,1000000')
+    parser.add_argument('--db-max-orders', type=int, default=100000,
+                        help='largest book used by the settlement and endpoint suites')
+    parser.add_argument('--patterns', default=','.join(PATTERNS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    suites = args.suite.split(',')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    db_sizes = [size for size in sizes if size <= args.db_max_orders]
+    patterns = args.patterns.split(',')
+    output = os.path.abspath(args.output) if args.output else None
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeats': args.repeats,
+        },
+        'results': [],
+    }
+    if 'engine' in suites:
+        report['results'] += bench_engine(sizes, patterns, args.repeats, args.seed)
+    if 'settlement' in suites or 'endpoint' in suites:
+        with tempfile.TemporaryDirectory() as workdir:
+            app_module = load_app(workdir)
+            if 'settlement' in suites:
+                report['results'] += bench_settlement(app_module, db_sizes, patterns, args.repeats, args.seed)
+            if 'endpoint' in suites:
+                report['results'] += bench_endpoint(app_module, db_sizes, patterns, args.repeats, args.seed)
+            with app_module.app.app_context():
+                app_module.db.engine.dispose()
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
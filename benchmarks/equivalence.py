@@ -0,0 +1,143 @@
+"""
+Randomized equivalence check of the clearing engines.
+
+double_auction_uniform_price is the reference definition of the clearing
+rules. On seeded random books this checks that
+double_auction_uniform_price_vectorized (on pair lists and on arrays) and
+both of match_orders' engines, the loop it uses for small books and the
+vectorized one (sorting the books themselves, and presorted from an
+OrderBook, as process_bid_round calls match_orders), give the same uniform
+price and traded quantity, and that their fills are the trades of the
+reference's pairwise matching walk. The books are small and deliberately awkward: prices drawn
+from a few ticks so that orders tie, zero-quantity orders, and empty sides.
+
+Exits with status 1 and prints the first counterexample on a mismatch.
+
+Usage:
+    python benchmarks/equivalence.py [--books 20000] [--max-orders 12] [--seed 0]
+"""
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Double_Auction import (  # noqa: E402
+    _match_loop, _match_vectorized, double_auction_uniform_price, double_auction_uniform_price_vectorized
+)
+from order_book import OrderBook  # noqa: E402
+
+
+def reference_fills(bids, asks):
+    """
+    (bid position, ask position, quantity) of every trade of
+    double_auction_uniform_price's matching walk, positions into the input.
+    """
+    sorted_bids = sorted(([price, quantity, k] for k, (price, quantity) in enumerate(bids)),
+                         key=lambda x: (-x[0], x[1]))
+    sorted_asks = sorted(([price, quantity, k] for k, (price, quantity) in enumerate(asks)),
+                         key=lambda x: (x[0], x[1]))
+    fills = []
+    i = j = 0
+    while i < len(sorted_bids) and j < len(sorted_asks):
+        bid, ask = sorted_bids[i], sorted_asks[j]
+        if bid[0] < ask[0]:
+            break
+        trade_qty = min(bid[1], ask[1])
+        if trade_qty:
+            fills.append((bid[2], ask[2], trade_qty))
+        bid[1] -= trade_qty
+        ask[1] -= trade_qty
+        if bid[1] == 0:
+            i += 1
+        if ask[1] == 0:
+            j += 1
+    return fills
+
+
+def random_side(rng, max_orders):
+    if rng.random() < 0.1:
+        return []
+    if rng.random() < 0.5:
+        # A few ticks only, so prices tie.
+        price = lambda: rng.choice((4.0, 4.5, 5.0, 5.5, 6.0))
+    else:
+        price = lambda: round(rng.uniform(1, 10), 2)
+    return [(price(), rng.choice((0, 1, 1, 2, 3, 5, 8))) for _ in range(rng.randint(1, max_orders))]
+
+
+def presorted(bids, asks):
+    """bids and asks as OrderBook.side_orders hands them over, with their input positions."""
+    book = OrderBook(1)
+    for side, orders in (('bid', bids), ('ask', asks)):
+        for k, (price, quantity) in enumerate(orders):
+            book.add(k, price, quantity, side, order_id=k + 1)
+    bid_positions, bid_arrays = book.side_orders('bid')
+    ask_positions, ask_arrays = book.side_orders('ask')
+    return bid_positions, bid_arrays, ask_positions, ask_arrays
+
+
+def fills_of(fills, bid_positions=None, ask_positions=None):
+    bid_index = fills.bid_index.tolist()
+    ask_index = fills.ask_index.tolist()
+    if bid_positions is not None:
+        bid_index = [bid_positions[k] for k in bid_index]
+        ask_index = [ask_positions[k] for k in ask_index]
+    return list(zip(bid_index, ask_index, fills.quantity.tolist()))
+
+
+def check_book(bids, asks):
+    """Returns a description of the first disagreement with the reference, or None."""
+    expected = double_auction_uniform_price(bids, asks)
+    expected_fills = reference_fills(bids, asks)
+    arrays = tuple((np.array([o[0] for o in side], dtype=np.float64),
+                    np.array([o[1] for o in side], dtype=np.int64)) for side in (bids, asks))
+
+    results = {
+        'vectorized_lists': double_auction_uniform_price_vectorized(bids, asks),
+        'vectorized_arrays': double_auction_uniform_price_vectorized(*arrays),
+    }
+    bid_positions, book_bids, ask_positions, book_asks = presorted(bids, asks)
+    fills = {}
+    for engine in (_match_loop, _match_vectorized):
+        name = engine.__name__
+        engine_fills = engine(*arrays)
+        results[name] = (engine_fills.uniform_price, engine_fills.total_quantity)
+        fills[name] = fills_of(engine_fills)
+        book_fills = engine(book_bids, book_asks, presorted=True)
+        results[name + '_presorted'] = (book_fills.uniform_price, book_fills.total_quantity)
+        # Orders were added to the book in input order, so equal orders keep it.
+        fills[name + '_presorted'] = fills_of(book_fills, bid_positions, ask_positions)
+
+    for name, result in results.items():
+        if result != expected:
+            return f'{name} cleared {result}, reference {expected}'
+    for name, engine_fills in fills.items():
+        if engine_fills != expected_fills:
+            return f'{name} fills {engine_fills}, reference {expected_fills}'
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--max-orders', type=int, default=12, help='most orders on each side')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for n in range(args.books):
+        bids = random_side(rng, args.max_orders)
+        asks = random_side(rng, args.max_orders)
+        problem = check_book(bids, asks)
+        if problem:
+            print(f'book {n}: {problem}\n    bids {bids}\n    asks {asks}')
+            sys.exit(1)
+    print(f'{args.books} books: every engine agrees with double_auction_uniform_price')
+
+
+if __name__ == '__main__':
+    main()
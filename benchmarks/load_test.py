@@ -0,0 +1,416 @@
+"""
+Load test of complete auction sessions over HTTP.
+
+Simulated participants make the same calls as the browser client:
+/register, /submit_description and /participant_info, then for each of
+the session's rounds /bid_submit followed by /round_result long-polls
+(wait=25, retrying after 3 s on errors, as bid.js does) until the round
+clears, and finally /final_tokens. Each participant is an asyncio task with
+its own keep-alive connection, like a browser tab, so one process can drive
+thousands of them. The HTTP/1.1 client is built on asyncio streams and
+needs nothing outside the standard library.
+
+Every session seats one participant per role (four with roles.ROLES). The
+sessions are created through /admin/sessions, so the server needs
+ADMIN_TOKEN set. Without --url a gunicorn server is started on a fresh
+SQLite database (or --database-url) in a temporary directory and stopped
+afterwards.
+
+Reported per endpoint: requests, errors (transport failures and unexpected
+statuses), error rate, throughput and p50/p99 latency. /round_result
+latencies include the long-poll wait for the round to clear.
+
+A participant that has not finished within --participant-timeout seconds
+of joining gives up, so a session left short of a participant (say, a
+failed registration) or a server that stops clearing rounds ends the run
+instead of hanging it. Sessions in which any participant did not complete
+are listed in the report.
+
+Usage:
+    python benchmarks/load_test.py [--sessions 250] [--ramp-up 10] [--think 0.5]
+        [--participant-timeout 600] [--workers 4] [--worker-class gthread] [--threads 64]
+        [--database-url URL] [--output results.json]
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --admin-token TOKEN [--sessions 250]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from roles import ROLES  # noqa: E402
+
+ROUND_RESULT_WAIT = 25      # seconds, as bid.js asks for
+ERROR_RETRY_DELAY = 3       # seconds before bid.js polls again after an error
+REGISTER_ATTEMPTS = 5
+ROLES_BY_PARTICIPANT = {info['participant_id']: info for info in ROLES.values()}
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection carrying JSON requests."""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, payload=None, headers=()):
+        """Returns (status, decoded JSON body, or the text of any other body, or None)."""
+        for attempt in (1, 2):
+            reused = self._writer is not None
+            try:
+                return await asyncio.wait_for(self._exchange(method, path, payload, headers), self.timeout)
+            except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError) as e:
+                self.close()
+                # The server may close an idle keep-alive connection just as
+                # a request goes out; a browser resends it on a new one.
+                if attempt == 2 or not reused or getattr(e, 'partial', b''):
+                    raise
+            except BaseException:
+                self.close()
+                raise
+
+    async def _exchange(self, method, path, payload, headers):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b''
+        head = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Accept: application/json']
+        head += [f'{name}: {value}' for name, value in headers]
+        if payload is not None:
+            head += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+        self._writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed by server')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = b''
+            while True:
+                size = int((await self._reader.readline()).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+                data += chunk[:-2]
+        else:
+            data = await self._reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        if 'json' not in headers.get('content-type', ''):
+            # e.g. an HTML error page from the server or a proxy
+            return status, data.decode('utf-8', 'replace') or None
+        return status, json.loads(data) if data else None
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+class LoadStats:
+    """Latencies and errors per endpoint, plus participant outcomes."""
+
+    def __init__(self):
+        self.latencies = {}     # endpoint -> [seconds]
+        self.errors = {}        # endpoint -> Counter of status codes / exception names
+        self.participants = Counter()
+        self.unfinished_sessions = set()
+
+    def finished(self, session_id, outcome):
+        """Record how a participant of session_id ended: 'completed' or the way it failed."""
+        self.participants[outcome] += 1
+        if outcome != 'completed':
+            self.unfinished_sessions.add(session_id)
+
+    async def call(self, connection, endpoint, method, path, payload=None, expected=(200,)):
+        """Make one request and record it; returns the body, or None if it failed."""
+        start = time.perf_counter()
+        try:
+            status, body = await connection.request(method, path, payload)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            self.latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+            self.errors.setdefault(endpoint, Counter())[type(e).__name__] += 1
+            return None
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+        if status not in expected:
+            self.errors.setdefault(endpoint, Counter())[str(status)] += 1
+            return None
+        return body if body is not None else {}
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            errors = self.errors.get(endpoint, Counter())
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'errors': sum(errors.values()),
+                'error_rate': sum(errors.values()) / len(latencies),
+                'error_kinds': dict(errors),
+                'requests_per_s': len(latencies) / elapsed,
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000,
+            }
+        requests = sum(result['requests'] for result in endpoints.values())
+        errors = sum(result['errors'] for result in endpoints.values())
+        return {
+            'elapsed_s': elapsed,
+            'requests': requests,
+            'requests_per_s': requests / elapsed,
+            'error_rate': errors / requests if requests else 0.0,
+            'participants': dict(self.participants),
+            'unfinished_sessions': sorted(self.unfinished_sessions),
+            'endpoints': endpoints,
+        }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def orders_for(info, rng):
+    """A round's orders for a participant of role info, priced around its marginal values."""
+    if info['side'] == 'buyer':
+        return [{'price': round(rng.uniform(0.6, 1.0) * value, 2), 'quantity': rng.randint(1, 10), 'type': 'bid'}
+                for value in (info['marginal_value_first'], info['marginal_value_second'])]
+    return [{'price': round(rng.uniform(1.0, 1.4) * value, 2), 'quantity': rng.randint(1, 10), 'type': 'ask'}
+            for value in (info['marginal_value_second'], info['marginal_value_first'])]
+
+
+async def participant(stats, host, port, args, session_id, number, start_delay):
+    """One simulated participant, from registration to the final token balance."""
+    rng = random.Random(f'{args.seed}-{session_id}-{number}')
+    connection = Connection(host, port, args.timeout)
+    await asyncio.sleep(start_delay)
+    try:
+        outcome = await asyncio.wait_for(play(stats, connection, rng, args, session_id, number),
+                                         args.participant_timeout)
+    except asyncio.TimeoutError:
+        outcome = 'timed_out'
+    finally:
+        connection.close()
+    stats.finished(session_id, outcome)
+
+
+async def play(stats, connection, rng, args, session_id, number):
+    """The participant's calls; returns its outcome for LoadStats.finished."""
+    async def think():
+        if args.think:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think))
+
+    for _ in range(REGISTER_ATTEMPTS):
+        registered = await stats.call(connection, '/register', 'POST', '/register', {
+            'firstName': f'load{number}', 'lastName': f'session{session_id}', 'sessionId': session_id})
+        if registered is not None:
+            break
+        # Participants joining together can race for the same role (409);
+        # the page asks them to try again.
+        await asyncio.sleep(rng.uniform(0.1, 1))
+    else:
+        return 'failed_register'
+    participant_id = registered['participantId']
+    info = ROLES_BY_PARTICIPANT[participant_id]
+    query = {'participantId': participant_id, 'sessionId': session_id}
+    await think()
+    await stats.call(connection, '/submit_description', 'POST', '/submit_description',
+                     dict(query, answer1='load test', answer2='load test'))
+    await stats.call(connection, '/participant_info', 'GET', '/participant_info?' + urlencode(query))
+
+    while True:
+        await think()
+        submitted = await stats.call(connection, '/bid_submit', 'POST', '/bid_submit',
+                                     dict(query, bids=orders_for(info, rng)), expected=(200, 202))
+        if submitted is None:
+            await asyncio.sleep(ERROR_RETRY_DELAY)
+            continue
+        if submitted.get('status') not in ('waiting', 'pending'):
+            break   # 'Auction completed'
+        path = '/round_result?' + urlencode(dict(query, roundNumber=submitted['round_number'],
+                                                 wait=ROUND_RESULT_WAIT))
+        while True:
+            result = await stats.call(connection, '/round_result', 'GET', path)
+            if result is None:
+                await asyncio.sleep(ERROR_RETRY_DELAY)
+            elif result.get('round_info'):
+                break
+        if result['round_info']['auction_completed']:
+            break
+
+    final = await stats.call(connection, '/final_tokens', 'GET', '/final_tokens?' + urlencode(query))
+    return 'completed' if final is not None else 'failed_final_tokens'
+
+
+async def create_sessions(host, port, admin_token, count):
+    """Create count sessions with the default roles; returns their ids."""
+    connection = Connection(host, port, 60)
+    session_ids = []
+    try:
+        for k in range(count):
+            status, created = await connection.request('POST', '/admin/sessions', {'name': f'load test {k}'},
+                                                       headers=[('X-Admin-Token', admin_token)])
+            if status != 201:
+                raise RuntimeError(f'Could not create a session ({status}): {created}')
+            session_ids.append(created['sessionId'])
+    finally:
+        connection.close()
+    return session_ids
+
+
+async def run_load(url, admin_token, args):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    session_ids = await create_sessions(host, port, admin_token, args.sessions)
+    stats = LoadStats()
+    tasks = []
+    for k, session_id in enumerate(session_ids):
+        # Sessions start evenly over the ramp-up; their participants join together.
+        start_delay = args.ramp_up * k / len(session_ids)
+        for number in range(len(ROLES)):
+            tasks.append(participant(stats, host, port, args, session_id, number, start_delay))
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    report = stats.report(time.perf_counter() - start)
+    report.update(sessions=len(session_ids), simulated_participants=len(tasks))
+    return report
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(args):
+    """Run the application under gunicorn on a fresh database; yields its URL and admin token."""
+    with tempfile.TemporaryDirectory() as workdir:
+        admin_token = secrets.token_hex(16)
+        env = dict(os.environ, ADMIN_TOKEN=admin_token, PYTHONPATH=ROOT,
+                   DATABASE_URL=args.database_url or 'sqlite:///' + os.path.join(workdir, 'load.db'))
+        # auction.log is written to the working directory
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'wsgi', 'db', 'upgrade'],
+                       cwd=workdir, env=env, check=True, capture_output=True)
+        port = free_port()
+        server_log = open(os.path.join(workdir, 'gunicorn.log'), 'w')
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+             '--workers', str(args.workers), '--worker-class', args.worker_class,
+             '--threads', str(args.threads), '--keep-alive', '75', '--timeout', '120',
+             '--log-level', 'warning', 'wsgi:application'],
+            cwd=workdir, env=env, stdout=server_log, stderr=subprocess.STDOUT)
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                if server.poll() is not None:
+                    with open(server_log.name) as f:
+                        raise RuntimeError(f'gunicorn exited with status {server.returncode}:\n{f.read()[-2000:]}')
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError('gunicorn did not start listening within 30 s')
+                    time.sleep(0.2)
+            yield f'http://127.0.0.1:{port}', admin_token
+        finally:
+            server.terminate()
+            try:
+                server.wait(15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+            server_log.close()
+            if args.server_log:
+                shutil.copy(server_log.name, args.server_log)
+
+
+def raise_open_file_limit():
+    """Each simulated participant holds a socket; lift the soft limit to the hard one."""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def print_report(report):
+    print(f"{report['sessions']} sessions, {report['simulated_participants']} participants "
+          f"in {report['elapsed_s']:.1f} s: {report['participants']}")
+    if report['unfinished_sessions']:
+        print(f"{len(report['unfinished_sessions'])} sessions did not finish: {report['unfinished_sessions']}")
+    print(f"{'endpoint':<20} {'requests':>9} {'errors':>7} {'error %':>8} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p99 ms':>9}")
+    for endpoint, result in report['endpoints'].items():
+        print(f"{endpoint:<20} {result['requests']:>9} {result['errors']:>7} "
+              f"{result['error_rate'] * 100:>8.2f} {result['requests_per_s']:>9.1f} "
+              f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}")
+        if result['error_kinds']:
+            print(f"{'':<20} errors: {result['error_kinds']}")
+    print(f"{'total':<20} {report['requests']:>9} {'':>7} {report['error_rate'] * 100:>8.2f} "
+          f"{report['requests_per_s']:>9.1f}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='server to test; without it a local gunicorn server is started')
+    parser.add_argument('--admin-token', help='ADMIN_TOKEN of the --url server, for creating sessions')
+    parser.add_argument('--sessions', type=int, default=250, help='concurrent sessions, four participants each')
+    parser.add_argument('--ramp-up', type=float, default=10, help='seconds over which sessions start')
+    parser.add_argument('--think', type=float, default=0.5, help='mean pause before each participant action (s)')
+    parser.add_argument('--timeout', type=float, default=60, help='per-request timeout (s)')
+    parser.add_argument('--participant-timeout', type=float, default=600,
+                        help='seconds a participant may take from joining to its final tokens')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers of the local server')
+    parser.add_argument('--worker-class', default='gthread', help='gunicorn worker class of the local server')
+    parser.add_argument('--threads', type=int, default=64, help='threads per gthread worker of the local server')
+    parser.add_argument('--database-url', help='database of the local server (default: a new SQLite file)')
+    parser.add_argument('--server-log', help='keep the local server\'s log (gunicorn and application) in this file')
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    args = parser.parse_args()
+    if args.url and not args.admin_token:
+        parser.error('--admin-token is required with --url')
+
+    raise_open_file_limit()
+    if args.url:
+        report = asyncio.run(run_load(args.url, args.admin_token, args))
+    else:
+        with local_server(args) as (url, admin_token):
+            report = asyncio.run(run_load(url, admin_token, args))
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Before/after query-plan benchmark for the hot query patterns.
+
+Builds a synthetic bid and settlement history in a temporary SQLite database
+from the application's models, then runs each hot query with and without the
+secondary indexes, printing SQLite's query plan and the mean latency.
+
+Usage:
+    python benchmarks/query_plans.py [--rounds 50000] [--participants 10000] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SESSIONS = 10   # the history is spread over this many sessions
+
+HOT_QUERIES = {
+    'bids_by_round_participant':
+        'SELECT id FROM participant_bid '
+        'WHERE session_id = :session AND round_number = :round AND participant_id = :pid',
+    'bids_by_round_after_watermark':
+        'SELECT id, participant_id, price, quantity, type FROM participant_bid '
+        'WHERE session_id = :session AND round_number = :round AND id > 0 ORDER BY id',
+    'round_by_number':
+        'SELECT uniform_price, total_quantity FROM auction_round '
+        'WHERE session_id = :session AND round_number = :round',
+    'result_by_round_participant':
+        'SELECT executed_quantity, profit FROM participant_round_result '
+        'WHERE session_id = :session AND round_number = :round AND participant_id = :pid',
+    'roles_by_session':
+        'SELECT role FROM participant WHERE session_id = :session',
+}
+
+
+def session_of(round_number):
+    return round_number % SESSIONS + 1
+
+
+def load_metadata(workdir):
+    """
+    The application's table metadata. The application is imported against a
+    throwaway database in workdir, so that importing it leaves nothing in
+    the working tree.
+    """
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'app.db')
+    os.chdir(workdir)  # auction.log is written to the working directory
+    from instance.app import db
+    return db.metadata
+
+
+def build_history(engine, metadata, rounds, participants, seed):
+    rng = random.Random(seed)
+    pids = ['p%d' % i for i in range(participants)]
+    with engine.begin() as conn:
+        conn.execute(metadata.tables['auction_session'].insert(), [
+            {'id': session_id, 'name': 's%d' % session_id, 'total_rounds': rounds, 'current_round': rounds + 1}
+            for session_id in range(1, SESSIONS + 1)
+        ])
+        conn.execute(metadata.tables['participant'].insert(), [
+            {'session_id': session_of(i), 'participant_id': pid, 'first_name': 'f', 'last_name': 'l',
+             'role': ('bidder1', 'bidder2', 'seller1', 'seller2')[i % 4], 'tokens': 0}
+            for i, pid in enumerate(pids)
+        ])
+        bids, results, auction_rounds = [], [], []
+        for round_number in range(1, rounds + 1):
+            for pid in rng.sample(pids, 4):
+                for _ in range(2):
+                    bids.append({'session_id': session_of(round_number), 'participant_id': pid, 'price': rng.uniform(1, 12),
+                                 'quantity': rng.randint(1, 10), 'type': rng.choice(('bid', 'ask')),
+                                 'round_number': round_number})
+                results.append({'session_id': session_of(round_number), 'round_number': round_number,
+                                'participant_id': pid,
+                                'executed_quantity': rng.randint(0, 10), 'profit': rng.uniform(-10, 10)})
+            auction_rounds.append({'session_id': session_of(round_number), 'round_number': round_number, 'uniform_price': rng.uniform(1, 12),
+                                   'total_quantity': rng.randint(0, 40)})
+        conn.execute(metadata.tables['participant_bid'].insert(), bids)
+        conn.execute(metadata.tables['participant_round_result'].insert(), results)
+        conn.execute(metadata.tables['auction_round'].insert(), auction_rounds)
+
+
+def secondary_indexes(metadata):
+    return [index for table in metadata.sorted_tables for index in table.indexes]
+
+
+def measure(engine, rounds, participants, repeats, seed):
+    rng = random.Random(seed)
+    rounds_sampled = [rng.randint(1, rounds) for _ in range(repeats)]
+    samples = [{'session': session_of(round_number), 'round': round_number,
+                'pid': 'p%d' % rng.randint(0, participants - 1)} for round_number in rounds_sampled]
+    report = {}
+    with engine.connect() as conn:
+        for name, sql in HOT_QUERIES.items():
+            plan = conn.execute(text('EXPLAIN QUERY PLAN ' + sql), samples[0]).fetchall()
+            start = time.perf_counter()
+            for params in samples:
+                conn.execute(text(sql), params).fetchall()
+            elapsed = time.perf_counter() - start
+            report[name] = {
+                'plan': [row[-1] for row in plan],
+                'mean_ms': elapsed / len(samples) * 1000,
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=50000)
+    parser.add_argument('--participants', type=int, default=10000)
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+    output = os.path.abspath(args.json) if args.json else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        metadata = load_metadata(tmp)
+        engine = create_engine('sqlite:///' + os.path.join(tmp, 'history.db'))
+        metadata.create_all(engine)
+        indexes = secondary_indexes(metadata)
+        for index in indexes:
+            index.drop(engine)
+        build_history(engine, metadata, args.rounds, args.participants, args.seed)
+
+        results = {'rounds': args.rounds, 'participants': args.participants}
+        results['before'] = measure(engine, args.rounds, args.participants, args.repeats, args.seed)
+        for index in indexes:
+            index.create(engine)
+        with engine.begin() as conn:
+            conn.execute(text('ANALYZE'))
+        results['after'] = measure(engine, args.rounds, args.participants, args.repeats, args.seed)
+        engine.dispose()
+
+    for name in HOT_QUERIES:
+        before, after = results['before'][name], results['after'][name]
+        print(f'{name}: {before["mean_ms"]:.3f} ms -> {after["mean_ms"]:.3f} ms')
+        print(f'    before: {"; ".join(before["plan"])}')
+        print(f'    after:  {"; ".join(after["plan"])}')
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 let currentRound = 1;
 
-// Function to poll for round results.
+// Function to wait for round results. The server holds each request open
+// (long-poll) until the round clears or the wait expires, then we ask again.
 function pollRoundResult(roundNumber) {
     const participantId = sessionStorage.getItem('participantInfo') ? JSON.parse(sessionStorage.getItem('participantInfo')).participantId : null;
     if (!participantId) {
@@ -9,7 +10,7 @@ function pollRoundResult(roundNumber) {
         return;
     }
 
-    fetch(`${API_BASE_URL}/round_result?participantId=${participantId}&roundNumber=${roundNumber}`)
+    fetch(`${API_BASE_URL}/round_result?participantId=${participantId}&sessionId=${currentSessionId()}&roundNumber=${roundNumber}&wait=25`)
     .then(response => response.json())
     .then(data => {
          if (data.round_info) {
@@ -21,6 +22,11 @@ function pollRoundResult(roundNumber) {
                  <p>تعداد اجرا شده شما: ${roundInfo.executed_quantity}</p>
                  <p>سود شما: ${roundInfo.profit.toFixed(2)}</p>
              `;
+             if (roundInfo.auction_completed) {
+                 alert('حراج به پایان رسید!');
+                 window.location.href = 'final.html';
+                 return;
+             }
              currentRound++;
              document.getElementById('currentRound').textContent = currentRound;
              document.getElementById('bidForm').reset();
@@ -30,8 +36,14 @@ function pollRoundResult(roundNumber) {
                         <label>تعداد: <input type="number" class="quantity" required></label>
                     </div>
              `;
-         } else {
+         } else if (data.error) {
+             // Unknown session or participant: retrying at once would only
+             // repeat the error, so back off as for network failures.
+             console.error(data.error);
              setTimeout(() => pollRoundResult(roundNumber), 3000);
+         } else {
+             // The long-poll timed out before the round cleared; wait again.
+             pollRoundResult(roundNumber);
          }
     })
     .catch(err => {
@@ -68,7 +80,7 @@ document.getElementById('showInfo').addEventListener('click', function(){
        return;
    }
 
-   fetch(`${API_BASE_URL}/participant_info?participantId=${participantId}`)
+   fetch(`${API_BASE_URL}/participant_info?participantId=${participantId}&sessionId=${currentSessionId()}`)
        .then(response => response.json())
        .then(data => {
            if(data.error){
@@ -114,40 +126,20 @@ document.getElementById('bidForm').addEventListener('submit', function(e){
     fetch(`${API_BASE_URL}/bid_submit`, {
         method: 'POST',
         headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify({ participantId, bids })
+        body: JSON.stringify({ participantId, sessionId: currentSessionId(), bids })
     })
     .then(response => response.json())
     .then(data => {
         if(data.error){
             alert(data.error);
-        } else {
-            if(data.message.includes('Waiting')) {
-                document.getElementById('lastRoundResults').innerHTML = `<p>در انتظار نتایج دور...</p>`;
-                const roundNumber = data.round_number;
-                pollRoundResult(roundNumber);
-            } else {
-                const roundInfo = data.round_info;
-                document.getElementById('lastRoundResults').innerHTML = `
-                    <p><strong>نتایج دور ${roundInfo.round_number}:</strong></p>
-                    <p>قیمت یکسان: ${roundInfo.uniform_price.toFixed(2)}</p>
-                    <p>تعداد کل: ${roundInfo.total_quantity}</p>
-                    <p>تعداد اجرا شده شما: ${data.participant_result.executed_quantity}</p>
-                    <p>سود شما: ${data.participant_result.profit.toFixed(2)}</p>
-                `;
-                if(data.message && data.message.includes('Auction completed')){
-                    alert('حراج به پایان رسید!');
-                    window.location.href = 'final.html';
-                    return;
-                }
-                currentRound++;
-                document.getElementById('currentRound').textContent = currentRound;
-                document.getElementById('bidForm').reset();
-                document.getElementById('bidEntries').innerHTML = `
-                    <div class="bid-entry">
-                        <label>قیمت: <input type="number" class="price" step="0.01" required></label>
-                        <label>تعداد: <input type="number" class="quantity" required></label>
-                    </div>
-                `;
+        } else if(data.status === 'waiting' || data.status === 'pending') {
+            // The round is cleared in the background; wait for its results.
+            document.getElementById('lastRoundResults').innerHTML = `<p>در انتظار نتایج دور...</p>`;
+            pollRoundResult(data.round_number);
+        } else if(data.message) {
+            alert(data.message);
+            if(data.message.includes('Auction completed')){
+                window.location.href = 'final.html';
             }
         }
     })
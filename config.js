@@ -1 +1,8 @@
-const API_BASE_URL = 'https://arvand.pythonanywhere.com'; 
\ No newline at end of file
+const API_BASE_URL = 'https://arvand.pythonanywhere.com';
+
+// Session joined at registration (index.html?session=<id>); the server uses
+// its default session when none is given.
+function currentSessionId() {
+    const info = sessionStorage.getItem('participantInfo');
+    return (info && JSON.parse(info).sessionId) || new URLSearchParams(window.location.search).get('session') || '';
+}
@@ -14,7 +14,7 @@ document.getElementById('descriptionForm').addEventListener('submit', function(e
     fetch(`${API_BASE_URL}/submit_description`, {
         method: 'POST',
         headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify({ participantId, answer1, answer2 })
+        body: JSON.stringify({ participantId, sessionId: currentSessionId(), answer1, answer2 })
     })
     .then(response => response.json())
     .then(data => {
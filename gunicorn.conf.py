@@ -0,0 +1,23 @@
+"""
+Gunicorn settings, read by default from the working directory:
+
+    gunicorn wsgi:application
+
+/round_result long-polls for up to ROUND_WAIT_MAX seconds and
+/round_result/stream stays open for a whole round, each holding a worker
+thread while it waits (without a database connection). A sync worker would
+serve one such request at a time, so a few waiting participants would
+starve every other request; threaded workers keep serving while they wait.
+Every participant has one poll open at most, so the threads of all workers
+together should exceed the participants online at once.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:' + os.environ.get('PORT', '5000'))
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 64))
+# Longer than ROUND_WAIT_MAX, so a long-poll is never taken for a hung worker.
+timeout = 60
+# Polling clients come straight back; keep their connections open in between.
+keepalive = 30
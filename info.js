@@ -6,7 +6,7 @@ document.addEventListener('DOMContentLoaded', function(){
         return;
     }
 
-    fetch(`${API_BASE_URL}/participant_info?participantId=${participantId}`)
+    fetch(`${API_BASE_URL}/participant_info?participantId=${participantId}&sessionId=${currentSessionId()}`)
        .then(response => response.json())
        .then(data => {
            if(data.error){
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+
+
+class SubmissionRejected(Exception):
+    """A submission the batch writer refused; the message is meant for the participant."""
+
+
+class DuplicateSubmission(SubmissionRejected):
+    pass
+
+
+class WriteFailed(Exception):
+    """flush() raised before the submission was given a result; it may be submitted again."""
+
+
+class PendingSubmission:
+    """One submission waiting in a GroupCommitQueue; flush() sets result or error."""
+    __slots__ = ('key', 'rows', 'result', 'error', 'done')
+
+    def __init__(self, key, rows):
+        self.key = key
+        self.rows = rows
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class GroupCommitQueue:
+    """
+    Group commit for small, bursty writes.
+
+    submit() queues a submission and blocks until it is durable. A single
+    writer thread collects whatever has queued up within interval seconds
+    (at most max_batch submissions) and hands the batch to flush(batch),
+    which writes every submission in one transaction and sets each one's
+    result or error, the results as soon as the transaction commits. If
+    flush() raises, every submission still without a result or error gets a
+    WriteFailed error. A burst of N submissions therefore costs a handful
+    of commits instead of N, and requests no longer queue on the database's
+    writer lock one by one.
+
+    Keys of queued submissions are tracked, so a second submission with the
+    same key is rejected in memory while the first is still in flight.
+    """
+
+    def __init__(self, flush, interval=0.005, max_batch=500):
+        self.flush = flush
+        self.interval = interval
+        self.max_batch = max_batch
+        self.batches = 0
+        self.submissions = 0
+        self._queue = []
+        self._pending_keys = set()
+        self._condition = threading.Condition()
+        self._pid = None
+
+    def start(self):
+        """Start the writer thread once per process (gunicorn forks after import)."""
+        if self._pid == os.getpid():
+            return
+        with self._condition:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='group-commit', daemon=True).start()
+
+    def is_pending(self, key):
+        with self._condition:
+            return key in self._pending_keys
+
+    def submit(self, key, rows, timeout):
+        """
+        Queue rows under key and wait until they are written; returns the result flush() set.
+
+        If the writer has not taken the submission within timeout seconds it
+        is withdrawn and TimeoutError is raised, so nothing is written and
+        the caller may submit again.
+        """
+        self.start()
+        item = PendingSubmission(key, rows)
+        with self._condition:
+            if key in self._pending_keys:
+                raise DuplicateSubmission(key)
+            self._pending_keys.add(key)
+            self._queue.append(item)
+            self._condition.notify()
+        if not item.done.wait(timeout):
+            with self._condition:
+                queued = item in self._queue
+                if queued:
+                    self._queue.remove(item)
+                    self._pending_keys.discard(key)
+            if queued:
+                raise TimeoutError('Submission was not written within %s seconds' % timeout)
+            # The writer already took the batch; its outcome is this submission's.
+            item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue)
+            # Let the rest of a burst arrive before taking the batch.
+            time.sleep(self.interval)
+            with self._condition:
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+            try:
+                self.flush(batch)
+            except Exception as e:
+                # Submissions flush() already answered keep their outcome.
+                for item in batch:
+                    if item.error is None and item.result is None:
+                        item.error = WriteFailed(str(e))
+                        item.error.__cause__ = e
+            self.batches += 1
+            self.submissions += len(batch)
+            with self._condition:
+                for item in batch:
+                    self._pending_keys.discard(item.key)
+            for item in batch:
+                item.done.set()
@@ -0,0 +1,79 @@
+"""initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 08:41:27.287843
+
+The tables as originally created by db.create_all(). Databases created that
+way can be marked as being at this revision with `flask db stamp 0001`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('auction_round',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('round_number', sa.Integer(), nullable=False),
+    sa.Column('uniform_price', sa.Float(), nullable=False),
+    sa.Column('total_quantity', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('participant',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('participant_id', sa.String(length=10), nullable=False),
+    sa.Column('first_name', sa.String(length=50), nullable=False),
+    sa.Column('last_name', sa.String(length=50), nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.Column('initial_money', sa.Float(), nullable=True),
+    sa.Column('water', sa.Float(), nullable=True),
+    sa.Column('marginal_value_first', sa.Float(), nullable=True),
+    sa.Column('marginal_value_second', sa.Float(), nullable=True),
+    sa.Column('tokens', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('participant_id')
+    )
+    op.create_table('participant_bid',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('participant_id', sa.String(length=10), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('round_number', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('participant_response',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('participant_id', sa.String(length=10), nullable=False),
+    sa.Column('answer1', sa.Text(), nullable=True),
+    sa.Column('answer2', sa.Text(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('participant_round_result',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('round_number', sa.Integer(), nullable=False),
+    sa.Column('participant_id', sa.String(length=10), nullable=False),
+    sa.Column('executed_quantity', sa.Integer(), nullable=False),
+    sa.Column('profit', sa.Float(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('participant_round_result')
+    op.drop_table('participant_response')
+    op.drop_table('participant_bid')
+    op.drop_table('participant')
+    op.drop_table('auction_round')
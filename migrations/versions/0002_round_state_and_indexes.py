@@ -0,0 +1,70 @@
+"""round state and indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 08:41:36.169901
+
+Adds the auction_state table holding the current round, and indexes for the
+hot query patterns: bids by (round_number, participant_id), participants by
+role, and unique round results so a round cannot be settled twice.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('auction_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('current_round', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Before round state was shared, a restart reset the round counter and the
+    # same round could be settled more than once; the unique indexes below
+    # cannot be built over such history.
+    connection = op.get_bind()
+    duplicated = connection.execute(sa.text(
+        'SELECT round_number FROM auction_round GROUP BY round_number HAVING COUNT(*) > 1'
+    )).fetchall()
+    if duplicated:
+        raise RuntimeError(
+            'auction_round has rounds settled more than once (%s); archive or remove '
+            'the duplicate history before upgrading.' % ', '.join(str(r[0]) for r in duplicated)
+        )
+
+    with op.batch_alter_table('auction_round', schema=None) as batch_op:
+        batch_op.create_index('ux_auction_round_round_number', ['round_number'], unique=True)
+
+    with op.batch_alter_table('participant', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_participant_role'), ['role'], unique=False)
+
+    with op.batch_alter_table('participant_bid', schema=None) as batch_op:
+        batch_op.create_index('ix_participant_bid_round_participant', ['round_number', 'participant_id'], unique=False)
+
+    with op.batch_alter_table('participant_round_result', schema=None) as batch_op:
+        batch_op.create_index('ux_participant_round_result_round_participant', ['round_number', 'participant_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('participant_round_result', schema=None) as batch_op:
+        batch_op.drop_index('ux_participant_round_result_round_participant')
+
+    with op.batch_alter_table('participant_bid', schema=None) as batch_op:
+        batch_op.drop_index('ix_participant_bid_round_participant')
+
+    with op.batch_alter_table('participant', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_participant_role'))
+
+    with op.batch_alter_table('auction_round', schema=None) as batch_op:
+        batch_op.drop_index('ux_auction_round_round_number')
+
+    op.drop_table('auction_state')
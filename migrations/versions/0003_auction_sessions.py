@@ -0,0 +1,126 @@
+"""auction sessions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:05.512031
+
+Adds the auction_session table, one row per independent market with its own
+role configuration and round counter, and keys every other table on
+session_id. Existing data becomes session 1 (the default session), which
+takes over the current round from auction_state; auction_state is dropped.
+Participant ids and round numbers are now unique per session, and the
+indexes lead with session_id.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+DEFAULT_SESSION_ID = 1
+TOTAL_ROUNDS = 8
+SESSION_TABLES = ('participant', 'participant_response', 'participant_bid', 'auction_round',
+                  'participant_round_result')
+# participant.participant_id was created with an unnamed unique constraint;
+# batch mode on SQLite finds it through this naming convention.
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+
+def participant_id_constraint():
+    if op.get_bind().dialect.name == 'postgresql':
+        return 'participant_participant_id_key'
+    return 'uq_participant_participant_id'
+
+
+def upgrade():
+    op.create_table('auction_session',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('roles', sa.Text(), nullable=True),
+    sa.Column('total_rounds', sa.Integer(), nullable=False),
+    sa.Column('current_round', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    connection = op.get_bind()
+    current_round = connection.execute(sa.text('SELECT current_round FROM auction_state WHERE id = 1')).scalar()
+    if current_round is None:
+        current_round = (connection.execute(sa.text('SELECT MAX(round_number) FROM auction_round')).scalar() or 0) + 1
+    connection.execute(
+        sa.text('INSERT INTO auction_session (id, name, total_rounds, current_round, created_at, timestamp) '
+                'VALUES (:id, :name, :total_rounds, :current_round, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)'),
+        {'id': DEFAULT_SESSION_ID, 'name': 'default', 'total_rounds': TOTAL_ROUNDS, 'current_round': current_round}
+    )
+    if connection.dialect.name == 'postgresql':
+        connection.execute(sa.text(
+            "SELECT setval(pg_get_serial_sequence('auction_session', 'id'), (SELECT MAX(id) FROM auction_session))"
+        ))
+
+    for table in SESSION_TABLES:
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.add_column(sa.Column('session_id', sa.Integer(), nullable=False,
+                                          server_default=str(DEFAULT_SESSION_ID)))
+            batch_op.create_foreign_key(f'fk_{table}_session_id', 'auction_session', ['session_id'], ['id'])
+            if table == 'participant':
+                batch_op.drop_constraint(participant_id_constraint(), type_='unique')
+                batch_op.create_index('ux_participant_session_participant', ['session_id', 'participant_id'],
+                                      unique=True)
+            elif table == 'participant_bid':
+                batch_op.drop_index('ix_participant_bid_round_participant')
+                batch_op.create_index('ix_participant_bid_session_round_participant',
+                                      ['session_id', 'round_number', 'participant_id'], unique=False)
+            elif table == 'auction_round':
+                batch_op.drop_index('ux_auction_round_round_number')
+                batch_op.create_index('ux_auction_round_session_round', ['session_id', 'round_number'],
+                                      unique=True)
+            elif table == 'participant_round_result':
+                batch_op.drop_index('ux_participant_round_result_round_participant')
+                batch_op.create_index('ux_participant_round_result_session_round_participant',
+                                      ['session_id', 'round_number', 'participant_id'], unique=True)
+
+    op.drop_table('auction_state')
+
+
+def downgrade():
+    op.create_table('auction_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('current_round', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    connection = op.get_bind()
+    connection.execute(sa.text(
+        'INSERT INTO auction_state (id, current_round, timestamp) '
+        'SELECT id, current_round, timestamp FROM auction_session WHERE id = :id'
+    ), {'id': DEFAULT_SESSION_ID})
+    # Only the default session fits the single-session schema.
+    for table in SESSION_TABLES:
+        connection.execute(sa.text(f'DELETE FROM {table} WHERE session_id != :id'), {'id': DEFAULT_SESSION_ID})
+
+    for table in reversed(SESSION_TABLES):
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            if table == 'participant':
+                batch_op.drop_index('ux_participant_session_participant')
+                batch_op.create_unique_constraint(participant_id_constraint(), ['participant_id'])
+            elif table == 'participant_bid':
+                batch_op.drop_index('ix_participant_bid_session_round_participant')
+                batch_op.create_index('ix_participant_bid_round_participant', ['round_number', 'participant_id'],
+                                      unique=False)
+            elif table == 'auction_round':
+                batch_op.drop_index('ux_auction_round_session_round')
+                batch_op.create_index('ux_auction_round_round_number', ['round_number'], unique=True)
+            elif table == 'participant_round_result':
+                batch_op.drop_index('ux_participant_round_result_session_round_participant')
+                batch_op.create_index('ux_participant_round_result_round_participant',
+                                      ['round_number', 'participant_id'], unique=True)
+            batch_op.drop_constraint(f'fk_{table}_session_id', type_='foreignkey')
+            batch_op.drop_column('session_id')
+
+    op.drop_table('auction_session')
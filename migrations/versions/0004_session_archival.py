@@ -0,0 +1,30 @@
+"""session archival
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:40:12.318427
+
+Adds auction_session.archived_at, set when a finished session's bids,
+descriptions, rounds and results have been moved out of the live tables
+into its archive file (see archive.py).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('auction_session', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('archived_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('auction_session', schema=None) as batch_op:
+        batch_op.drop_column('archived_at')
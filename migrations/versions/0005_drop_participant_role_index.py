@@ -0,0 +1,30 @@
+"""drop participant role index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 10:05:37.902114
+
+ix_participant_role served the global role lookups of the single-session
+schema. Since sessions were introduced, registration reads a session's
+assigned roles by session_id, which ux_participant_session_participant
+covers, and nothing filters on role alone any more.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('participant', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_participant_role'))
+
+
+def downgrade():
+    with op.batch_alter_table('participant', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_participant_role'), ['role'], unique=False)
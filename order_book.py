@@ -0,0 +1,148 @@
+import bisect
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from Double_Auction import PriceLadder
+
+
+class PriceLevel:
+    """All orders resting at one price, with their aggregated quantity."""
+    __slots__ = ('price', 'total_quantity', 'orders')
+
+    def __init__(self, price):
+        self.price = price
+        self.total_quantity = 0
+        # (quantity, sequence, participant_id), kept sorted so that orders at
+        # the same price come out by ascending quantity, then arrival.
+        self.orders = []
+
+
+class OrderBook:
+    """
+    Incremental order book for a single round of one session.
+
+    Bids and asks are grouped into price levels as they arrive; the level
+    prices, and the orders within each level, are kept sorted with
+    bisect.insort, so clearing can walk the book in matching order without
+    sorting it again. insort finds the place in O(log n) but shifts the list
+    to insert, so adding an order costs O(k) in the k orders at its price,
+    plus O(p) in the p price levels of its side when it opens a new level.
+    The shifts are memmoves, cheap at the sizes of a round's book.
+    Participants who have submitted are tracked in a set.
+
+    side_orders() hands a side to Double_Auction.match_orders as parallel
+    arrays, already in matching order.
+
+    The book also feeds a PriceLadder with every order, so the indicative
+    clearing price and volume are available at any time in O(log n) in the
+    width of the price range (see PriceLadder).
+
+    Orders carry the id of the row they were loaded from (last_order_id is
+    the highest applied), which lets the caller top the book up from the
+    database with only the rows it has not seen yet.
+    """
+
+    def __init__(self, round_number, session_id=None):
+        self.round_number = round_number
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        self.last_order_id = 0
+        self.order_count = 0
+        self._participants = set()
+        self._levels = {'bid': {}, 'ask': {}}
+        self._prices = {'bid': [], 'ask': []}
+        self.ladder = PriceLadder()
+
+    def add(self, participant_id, price, quantity, side, order_id=None):
+        """Add one order; orders that are neither 'bid' nor 'ask' only mark the participant."""
+        self.order_count += 1
+        sequence = order_id if order_id is not None else self.order_count
+        if order_id is not None:
+            self.last_order_id = max(self.last_order_id, order_id)
+        self._participants.add(participant_id)
+        levels = self._levels.get(side)
+        if levels is None:
+            return
+        level = levels.get(price)
+        if level is None:
+            level = levels[price] = PriceLevel(price)
+            bisect.insort(self._prices[side], price)
+        level.total_quantity += quantity
+        bisect.insort(level.orders, (quantity, sequence, participant_id))
+        self.ladder.add(side, price, quantity)
+
+    def has_submitted(self, participant_id):
+        return participant_id in self._participants
+
+    @property
+    def participant_count(self):
+        return len(self._participants)
+
+    def bid_levels(self):
+        """Bid price levels, highest price first."""
+        levels = self._levels['bid']
+        return [levels[price] for price in reversed(self._prices['bid'])]
+
+    def ask_levels(self):
+        """Ask price levels, lowest price first."""
+        levels = self._levels['ask']
+        return [levels[price] for price in self._prices['ask']]
+
+    def side_orders(self, side):
+        """
+        The 'bid' or 'ask' orders in matching order, as a list of participant
+        ids and the (prices, quantities) arrays match_orders takes.
+        """
+        levels = self.bid_levels() if side == 'bid' else self.ask_levels()
+        participant_ids = []
+        prices = []
+        quantities = []
+        for level in levels:
+            for quantity, _, participant_id in level.orders:
+                participant_ids.append(participant_id)
+                prices.append(level.price)
+                quantities.append(quantity)
+        return participant_ids, (np.array(prices, dtype=np.float64), np.array(quantities, dtype=np.int64))
+
+
+class OrderBookRegistry:
+    """
+    Thread-safe map of (session, round number) to its OrderBook.
+
+    Only open rounds' books are worth keeping. When a session's book for a
+    later round is created, the session's books for earlier rounds are
+    dropped, whichever worker cleared those rounds; and at most maxsize
+    books are kept in all, least recently used first out. A dropped book is
+    rebuilt from the database if it is needed again.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._books = OrderedDict()
+        self._latest_round = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id, round_number):
+        key = (session_id, round_number)
+        with self._lock:
+            book = self._books.get(key)
+            if book is not None:
+                self._books.move_to_end(key)
+                return book
+            if round_number > self._latest_round.get(session_id, 0):
+                self._latest_round[session_id] = round_number
+                for stale in [k for k in self._books if k[0] == session_id and k[1] < round_number]:
+                    del self._books[stale]
+            book = self._books[key] = OrderBook(round_number, session_id)
+            while len(self._books) > self.maxsize:
+                self._books.popitem(last=False)
+            return book
+
+    def discard(self, session_id, round_number):
+        with self._lock:
+            self._books.pop((session_id, round_number), None)
+
+    def __len__(self):
+        return len(self._books)
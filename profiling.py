@@ -0,0 +1,128 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+
+class SQLRecorder:
+    """
+    Per-thread SQL statement counts and time, from SQLAlchemy cursor events.
+
+    Statements are only recorded on threads between start() and stop(), so
+    an installed recorder costs a thread-local lookup per statement
+    elsewhere.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def install(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def start(self):
+        self._local.statements = {}   # SQL text -> [executions, seconds]
+
+    def stop(self):
+        statements = getattr(self._local, 'statements', None)
+        self._local.statements = None
+        return statements or {}
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if getattr(self._local, 'statements', None) is not None:
+            conn.info.setdefault('profiling_started', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        statements = getattr(self._local, 'statements', None)
+        started = conn.info.get('profiling_started')
+        if statements is None or not started:
+            return
+        entry = statements.setdefault(statement, [0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - started.pop()
+
+
+class ProfileSampler:
+    """Chooses every Nth call of a name for profiling; N = 0 turns sampling off."""
+
+    def __init__(self, every=None):
+        self.every = dict(every or {})
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Parse 'name=N,name=N', e.g. 'bid_submit=100,process_bid_round=1'."""
+        every = {}
+        for item in filter(None, (spec or '').split(',')):
+            name, _, n = item.partition('=')
+            every[name.strip()] = int(n)
+        return cls(every)
+
+    def set(self, name, n):
+        with self._lock:
+            if n:
+                self.every[name] = n
+            else:
+                self.every.pop(name, None)
+            self._calls.pop(name, None)
+
+    def sample(self, name):
+        n = self.every.get(name)
+        if not n:
+            return False
+        with self._lock:
+            calls = self._calls[name] = self._calls.get(name, 0) + 1
+        return calls % n == 0
+
+
+class Profile:
+    """A cProfile run plus the SQL its thread executed, saved as BASE.prof and BASE.json."""
+
+    def __init__(self, sql_recorder):
+        self.sql_recorder = sql_recorder
+        self.profiler = cProfile.Profile()
+        self.started = None
+        self.elapsed = None
+        self.statements = {}
+
+    def start(self):
+        self.sql_recorder.start()
+        self.started = time.perf_counter()
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # Only one cProfile profiler can run at a time (Python 3.12+);
+            # this run records its SQL only.
+            self.profiler = None
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.elapsed = time.perf_counter() - self.started
+        self.statements = self.sql_recorder.stop()
+
+    def save(self, directory, name, **details):
+        """Write the stats (load with pstats.Stats) and a JSON summary; returns the base path."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S.%f')
+        parts = [stamp, name]
+        if details.get('round_number') is not None:
+            parts.append('round%s' % details['round_number'])
+        parts.append(str(os.getpid()))
+        base = os.path.join(directory, '-'.join(parts))
+        if self.profiler is not None:
+            self.profiler.dump_stats(base + '.prof')
+        statements = sorted(self.statements.items(), key=lambda item: (-item[1][0], -item[1][1]))
+        summary = dict(details, name=name, elapsed_s=self.elapsed,
+                       sql_statements=sum(count for _, (count, _) in statements),
+                       sql_seconds=sum(seconds for _, (_, seconds) in statements),
+                       sql=[{'statement': sql, 'executions': count, 'seconds': seconds}
+                            for sql, (count, seconds) in statements])
+        with open(base + '.json', 'w') as f:
+            json.dump(summary, f, indent=2)
+        return base
@@ -0,0 +1,84 @@
+# ---------------------------
+# Participant Roles
+# ---------------------------
+# Endowment and marginal values of each role, assigned to participants in
+# registration order. Buyers value their first units at marginal_value_first
+# and further units at marginal_value_second; sellers give up their first
+# units at a cost of marginal_value_second and further units at
+# marginal_value_first.
+#
+# These are the roles of the default session; other sessions may configure
+# their own in the same format (see validate_roles).
+ROLES = {
+    'bidder1': {
+        'participant_id': 'b1',
+        'side': 'buyer',
+        'initial_money': 100,
+        'water': 0,
+        'marginal_value_first': 8,
+        'marginal_value_second': 6
+    },
+    'bidder2': {
+        'participant_id': 'b2',
+        'side': 'buyer',
+        'initial_money': 120,
+        'water': 0,
+        'marginal_value_first': 10,
+        'marginal_value_second': 8
+    },
+    'seller1': {
+        'participant_id': 's1',
+        'side': 'seller',
+        'initial_money': 0,
+        'water': 14,
+        'marginal_value_first': 6,
+        'marginal_value_second': 4
+    },
+    'seller2': {
+        'participant_id': 's2',
+        'side': 'seller',
+        'initial_money': 0,
+        'water': 16,
+        'marginal_value_first': 8,
+        'marginal_value_second': 6
+    }
+}
+
+BUYER_ROLES = tuple(role for role, info in ROLES.items() if info['side'] == 'buyer')
+SELLER_ROLES = tuple(role for role, info in ROLES.items() if info['side'] == 'seller')
+
+ROLE_SIDES = ('buyer', 'seller')
+ROLE_VALUES = ('initial_money', 'water', 'marginal_value_first', 'marginal_value_second')
+PARTICIPANT_ID_LENGTH = 10
+
+
+def validate_roles(roles):
+    """
+    Check a role configuration in the format of ROLES and return it with
+    missing endowments set to 0; raises ValueError describing the first
+    problem found.
+    """
+    if not isinstance(roles, dict) or not roles:
+        raise ValueError('roles must be a non-empty object of role name to role settings')
+    validated = {}
+    participant_ids = set()
+    for role, info in roles.items():
+        if not isinstance(info, dict):
+            raise ValueError(f'Role {role}: settings must be an object')
+        participant_id = info.get('participant_id')
+        if not isinstance(participant_id, str) or not 0 < len(participant_id) <= PARTICIPANT_ID_LENGTH:
+            raise ValueError(f'Role {role}: participant_id must be 1-{PARTICIPANT_ID_LENGTH} characters')
+        if participant_id in participant_ids:
+            raise ValueError(f'Role {role}: participant_id {participant_id} is used twice')
+        participant_ids.add(participant_id)
+        if info.get('side') not in ROLE_SIDES:
+            raise ValueError(f'Role {role}: side must be one of {", ".join(ROLE_SIDES)}')
+        values = {field: info.get(field, 0) for field in ROLE_VALUES}
+        for field, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f'Role {role}: {field} must be a number')
+        validated[role] = dict(participant_id=participant_id, side=info['side'], **values)
+    sides = {info['side'] for info in validated.values()}
+    if sides != set(ROLE_SIDES):
+        raise ValueError('roles must include at least one buyer and one seller')
+    return validated
@@ -0,0 +1,206 @@
+"""
+Offline auction simulator for parameter sweeps.
+
+Runs synthetic multi-round sessions of the call auction with bidding agents
+instead of live participants, clearing every round with the Double_Auction
+engine and scoring participants with the same profit rule as settlement.
+Sessions are spread over a process pool; each task returns compact NumPy
+arrays of per-round prices, volumes and participant surplus.
+
+A sweep runs --sessions sessions at every point of a grid over role
+parameters, e.g. the marginal values in roles.ROLES:
+
+    python simulator.py --agent zi --sessions 1000 \\
+        --grid bidder1.marginal_value_first=6:12:0.5 \\
+        --grid seller1.marginal_value_second=2:6:0.5 --output sweep.npz
+
+Agents:
+    truthful   orders at the participant's own marginal values
+    zi         zero-intelligence constrained: random prices that never
+               trade at a loss (buyers below value, sellers above cost)
+    shading    marginal values shaded by a random 0-30% toward a profit
+"""
+import argparse
+import copy
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Double_Auction import fill_profit, match_orders
+from roles import BUYER_ROLES, ROLE_VALUES, ROLES
+
+TOTAL_ROUNDS = 8
+UNITS_PER_VALUE = 10     # each marginal value covers a block of 10 units
+MAX_SHADING = 0.3
+
+
+def role_blocks(role, info):
+    """(value, quantity) blocks a participant may trade, in the order the profit rule values them."""
+    if role in BUYER_ROLES:
+        return [(info['marginal_value_first'], UNITS_PER_VALUE),
+                (info['marginal_value_second'], UNITS_PER_VALUE)]
+    water = int(info['water'])
+    first = min(water, UNITS_PER_VALUE)
+    blocks = [(info['marginal_value_second'], first)]
+    if water > first:
+        blocks.append((info['marginal_value_first'], water - first))
+    return blocks
+
+
+def agent_orders(agent, rng, is_buyer, blocks, price_ceiling):
+    """Orders (price, quantity) an agent submits for one round."""
+    orders = []
+    for value, quantity in blocks:
+        if quantity <= 0:
+            continue
+        if agent == 'truthful':
+            price = value
+        elif agent == 'zi':
+            price = rng.uniform(0, value) if is_buyer else rng.uniform(value, price_ceiling)
+        elif agent == 'shading':
+            shade = rng.uniform(0, MAX_SHADING)
+            price = value * (1 - shade) if is_buyer else value * (1 + shade)
+        else:
+            raise ValueError(f'Unknown agent: {agent}')
+        orders.append((round(price, 2), quantity))
+    return orders
+
+
+def run_session(roles, agent, rounds, seed):
+    """Simulate one session; returns prices[rounds], volumes[rounds], surplus[rounds, participants]."""
+    rng = random.Random(seed)
+    names = list(roles)
+    blocks = [role_blocks(role, roles[role]) for role in names]
+    is_buyer = [role in BUYER_ROLES for role in names]
+    price_ceiling = 2 * max(max(info['marginal_value_first'], info['marginal_value_second'])
+                            for info in roles.values())
+    prices = np.zeros(rounds, dtype=np.float32)
+    volumes = np.zeros(rounds, dtype=np.int32)
+    surplus = np.zeros((rounds, len(names)), dtype=np.float32)
+    for r in range(rounds):
+        # Each side as order owners, prices and quantities.
+        sides = {True: ([], [], []), False: ([], [], [])}
+        for k in range(len(names)):
+            owners, side_prices, quantities = sides[is_buyer[k]]
+            for price, quantity in agent_orders(agent, rng, is_buyer[k], blocks[k], price_ceiling):
+                owners.append(k)
+                side_prices.append(price)
+                quantities.append(quantity)
+        bid_owners, bid_prices, bid_qtys = sides[True]
+        ask_owners, ask_prices, ask_qtys = sides[False]
+        # The same engine and profit rule as process_bid_round.
+        fills = match_orders((np.array(bid_prices, dtype=np.float64), np.array(bid_qtys, dtype=np.int64)),
+                             (np.array(ask_prices, dtype=np.float64), np.array(ask_qtys, dtype=np.int64)))
+        prices[r] = fills.uniform_price
+        volumes[r] = fills.total_quantity
+        first_bought, bought = fills.traded('bid', bid_owners, len(names))
+        first_sold, sold = fills.traded('ask', ask_owners, len(names))
+        for k, name in enumerate(names):
+            first, traded = (first_bought[k], bought[k]) if is_buyer[k] else (first_sold[k], sold[k])
+            surplus[r, k] = fill_profit(is_buyer[k], first, traded, fills.uniform_price,
+                                        roles[name]['marginal_value_first'], roles[name]['marginal_value_second'])
+    return prices, volumes, surplus
+
+
+def simulate_chunk(task):
+    """Worker entry point: run sessions [start, stop) of one grid point."""
+    point, roles, agent, rounds, start, stop, seed = task
+    n = stop - start
+    prices = np.zeros((n, rounds), dtype=np.float32)
+    volumes = np.zeros((n, rounds), dtype=np.int32)
+    surplus = np.zeros((n, rounds, len(roles)), dtype=np.float32)
+    for s in range(n):
+        prices[s], volumes[s], surplus[s] = run_session(roles, agent, rounds, hash((seed, point, start + s)))
+    return point, start, prices, volumes, surplus
+
+
+def parse_grid(specs):
+    """
+    Parse role.field=start:stop:step specs (stop inclusive) into names and
+    grid points; field is one of roles.ROLE_VALUES.
+    """
+    names, axes = [], []
+    for spec in specs:
+        name, _, span = spec.partition('=')
+        role, _, field = name.partition('.')
+        if role not in ROLES or field not in ROLE_VALUES:
+            raise ValueError(f'Unknown role parameter: {name}')
+        start, stop, step = (float(x) for x in span.split(':'))
+        names.append((role, field))
+        axes.append(np.round(np.arange(start, stop + step / 2, step), 6).tolist())
+    return names, list(itertools.product(*axes)) or [()]
+
+
+def run_sweep(names, points, agent, sessions, rounds, workers, seed):
+    n_participants = len(ROLES)
+    prices = np.zeros((len(points), sessions, rounds), dtype=np.float32)
+    volumes = np.zeros((len(points), sessions, rounds), dtype=np.int32)
+    surplus = np.zeros((len(points), sessions, rounds, n_participants), dtype=np.float32)
+
+    chunk = max(1, min(sessions, sessions * len(points) // (workers * 8) or 1))
+    tasks = []
+    for point, values in enumerate(points):
+        roles = copy.deepcopy(ROLES)
+        for (role, field), value in zip(names, values):
+            roles[role][field] = value
+        for start in range(0, sessions, chunk):
+            tasks.append((point, roles, agent, rounds, start, min(start + chunk, sessions), seed))
+
+    def collect(outputs):
+        for point, start, p, v, s in outputs:
+            prices[point, start:start + len(p)] = p
+            volumes[point, start:start + len(p)] = v
+            surplus[point, start:start + len(p)] = s
+
+    if workers == 1:
+        collect(map(simulate_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            collect(executor.map(simulate_chunk, tasks))
+    return prices, volumes, surplus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--agent', default='zi', choices=('truthful', 'zi', 'shading'))
+    parser.add_argument('--sessions', type=int, default=1000, help='sessions per grid point')
+    parser.add_argument('--rounds', type=int, default=TOTAL_ROUNDS)
+    parser.add_argument('--grid', action='append', default=[],
+                        help='role.field=start:stop:step, may be repeated')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the arrays to this .npz file')
+    args = parser.parse_args()
+
+    names, points = parse_grid(args.grid)
+    started = time.perf_counter()
+    prices, volumes, surplus = run_sweep(names, points, args.agent, args.sessions, args.rounds,
+                                         args.workers, args.seed)
+    elapsed = time.perf_counter() - started
+    total_sessions = len(points) * args.sessions
+    print(f'{total_sessions} sessions ({len(points)} grid points) in {elapsed:.2f} s '
+          f'with {args.workers} workers')
+
+    header = ' '.join(f'{role}.{field}' for role, field in names)
+    print(f'{header}  mean_price  mean_volume  mean_round_surplus')
+    for point, values in enumerate(points):
+        label = ' '.join(f'{value:g}' for value in values)
+        print(f'{label}  {prices[point].mean():10.3f}  {volumes[point].mean():11.2f}  '
+              f'{surplus[point].sum(axis=-1).mean():18.3f}')
+
+    if args.output:
+        np.savez_compressed(
+            args.output,
+            prices=prices, volumes=volumes, surplus=surplus,
+            grid_names=np.array([f'{role}.{field}' for role, field in names]),
+            grid_values=np.array(points, dtype=np.float64).reshape(len(points), len(names)),
+            participants=np.array(list(ROLES)),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Database engine settings for the supported storage backends.
+
+PostgreSQL
+    Multi-worker deployments. Connections come from a sized pool and are
+    checked with a pre-ping before use, so connections dropped by the server
+    or a proxy are replaced instead of failing a request.
+
+SQLite
+    Single-node deployments, in one of two modes:
+    tuned      WAL journaling, so readers never block the writer and the
+               writer never blocks readers, and synchronous=NORMAL, which
+               syncs the WAL at checkpoints instead of on every commit
+               (a power loss may lose the last commits, never corrupt the
+               database)
+    default    SQLite's own rollback journal with synchronous=FULL
+    Both modes wait up to the busy timeout for the write lock instead of
+    failing with "database is locked". The journal mode is stored in the
+    database file, so switching modes rewrites it on the next connection.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+SQLITE_MODES = {
+    'tuned': {'journal_mode': 'WAL', 'synchronous': 'NORMAL'},
+    'default': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+}
+
+
+def backend_name(url):
+    return make_url(url).get_backend_name()
+
+
+def engine_options(url, config):
+    """SQLAlchemy create_engine() options for url, from the storage settings in config."""
+    backend = backend_name(url)
+    if backend == 'postgresql':
+        return {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': True,
+        }
+    if backend == 'sqlite':
+        # The driver's own lock wait, in seconds; busy_timeout below covers
+        # statements SQLite retries internally.
+        return {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}}
+    return {}
+
+
+def install_sqlite_pragmas(engine, mode, busy_timeout_ms):
+    """Apply the PRAGMAs of an SQLITE_MODES mode to every new connection of engine."""
+    if mode not in SQLITE_MODES:
+        raise ValueError(f'Unknown SQLite mode: {mode}')
+    pragmas = dict(SQLITE_MODES[mode], busy_timeout=int(busy_timeout_ms))
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
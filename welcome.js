@@ -15,7 +15,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 },
                 body: JSON.stringify({
                     firstName: firstName,
-                    lastName: lastName
+                    lastName: lastName,
+                    sessionId: currentSessionId()
                 })
             });
             